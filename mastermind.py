@@ -6,29 +6,45 @@
 #   @copyright 2022
 #
 
-from random import randrange
+import os
+import sys
+from functools import lru_cache
+from random import choices, randrange
 from time import sleep
+import numpy as np
 from colorama import Fore, Back, Style, init
 
+# Headless mode strips all terminal color work - scoring-only drivers
+#  (benchmarks, solvers) export MASTERMIND_HEADLESS=1 before importing
+HEADLESS = os.environ.get("MASTERMIND_HEADLESS", "0") != "0"
+
 # colorama has an init() to set the terminal up
 #  this only matters for Windows systems
-init()
+if not HEADLESS:
+    init()
+
+# Constants the render paths touch on every call
+_WHITE = "" if HEADLESS else Fore.WHITE
+_ROW_SEP = "*" * 28
 
 
 def cls():
-    """ Simple clear screen function """
-    print("\n" * 80)
+    """ Simple clear screen function - ANSI clear plus cursor home """
+    print("\x1b[2J\x1b[H", end="")
 
 
 # ** ******************************************************
 class Peg:
     """ Base class for all peg tokens in the game """
 
-    def __init__(self) -> None:
-        self.symbol = "\u2B24"
-        self.background = Back.LIGHTCYAN_EX
-        self.termUnicode = "X"
-        self.colorName = None
+    __slots__ = ()
+
+    symbol = "\u2B24"
+    background = Back.LIGHTCYAN_EX
+    termUnicode = "X"
+    colorName = None
+    letter = None
+    code = None
 
     def __str__(self):
         return self.termUnicode
@@ -37,76 +53,91 @@ class Peg:
         return self.colorName == other.colorName
 
     @staticmethod
+    @lru_cache(maxsize=8)
     def getPeg(pegChar: str) -> "Peg":
-        """ Static factory method to create Pegs by character name """
-        if pegChar == "R":
-            return RedPeg()
-        elif pegChar == "U":
-            return BluePeg()
-        elif pegChar == "G":
-            return GreenPeg()
-        elif pegChar == "B":
-            return BlackPeg()
-        elif pegChar == "W":
-            return WhitePeg()
-        elif pegChar == "Y":
-            return YellowPeg()
-        else:
-            return None
+        """ Static factory method returning the shared Peg by character name """
+        return _PEGS.get(pegChar)
 
 
 class RedPeg(Peg):
-    def __init__(self) -> None:
-        super().__init__()
-        self.colorName = "Red"
-        self.termUnicode = Fore.RED + self.symbol
+    __slots__ = ()
+
+    colorName = "Red"
+    code = 0
+    letter = "R"
+    termUnicode = letter if HEADLESS else Fore.RED + Peg.symbol
 
 
 class BluePeg(Peg):
-    def __init__(self) -> None:
-        super().__init__()
-        self.colorName = "Blue"
-        self.termUnicode = Fore.BLUE + self.symbol
+    __slots__ = ()
+
+    colorName = "Blue"
+    code = 1
+    letter = "U"
+    termUnicode = letter if HEADLESS else Fore.BLUE + Peg.symbol
 
 
 class GreenPeg(Peg):
-    def __init__(self) -> None:
-        super().__init__()
-        self.colorName = "Green"
-        self.termUnicode = Fore.GREEN + self.symbol
+    __slots__ = ()
+
+    colorName = "Green"
+    code = 2
+    letter = "G"
+    termUnicode = letter if HEADLESS else Fore.GREEN + Peg.symbol
 
 
 class YellowPeg(Peg):
-    def __init__(self) -> None:
-        super().__init__()
-        self.colorName = "Yellow"
-        self.termUnicode = Fore.YELLOW + self.symbol
+    __slots__ = ()
+
+    colorName = "Yellow"
+    code = 3
+    letter = "Y"
+    termUnicode = letter if HEADLESS else Fore.YELLOW + Peg.symbol
 
 
 class BlackPeg(Peg):
-    def __init__(self) -> None:
-        super().__init__()
-        self.colorName = "Black"
-        self.termUnicode = Fore.BLACK + self.symbol
+    __slots__ = ()
+
+    colorName = "Black"
+    code = 4
+    letter = "B"
+    termUnicode = letter if HEADLESS else Fore.BLACK + Peg.symbol
 
 
 class WhitePeg(Peg):
-    def __init__(self) -> None:
-        super().__init__()
-        self.colorName = "White"
-        self.termUnicode = Fore.WHITE + self.symbol
+    __slots__ = ()
+
+    colorName = "White"
+    code = 5
+    letter = "W"
+    termUnicode = letter if HEADLESS else Fore.WHITE + Peg.symbol
+
+
+# Pegs are immutable, so one shared instance per color serves every
+#  guess and target draw - no per-call allocations
+_PEGS = {
+    "R": RedPeg(),
+    "U": BluePeg(),
+    "G": GreenPeg(),
+    "Y": YellowPeg(),
+    "B": BlackPeg(),
+    "W": WhitePeg(),
+}
+_VALID_PEG_CHARS = frozenset(_PEGS)
+_ALL_PEGS = list(_PEGS.values())
 
 
 # ** *************************************************************************
 class TargetPegs:
+    __slots__ = ("revealPegs", "pegs", "_index")
+
     def __init__(self, pegs=None) -> None:
         self.revealPegs = False
         if pegs:
             self.pegs = pegs
         else:
-            self.pegs = []
-            for i in range(4):
-                self.pegs.append(self.getRandomPeg())
+            self.pegs = choices(_ALL_PEGS, k=4)
+        self._index = _codeIndex(self.pegs)
 
     def setRevealPegs(self):
         self.revealPegs = True
@@ -115,19 +146,14 @@ class TargetPegs:
         self.revealPegs = False
 
     def getRandomPeg(self):
-        pegLetters = ["R", "U", "G", "Y", "B", "W"]
-        return Peg.getPeg(pegLetters[randrange(len(pegLetters))])
+        return _ALL_PEGS[randrange(len(_ALL_PEGS))]
 
     def __str__(self):
-        ret = ""
         if self.revealPegs:
-            for peg in self.pegs:
-                ret += str(peg) + " "
+            shown = "".join([f"{peg} " for peg in self.pegs])
         else:
-            ret += "-SECRET-"
-        ret += "  |"
-        ret += Fore.WHITE
-        return ret
+            shown = "-SECRET-"
+        return f"{shown}  |{_WHITE}"
 
 
 # ** *************************************************************************
@@ -135,25 +161,69 @@ HINT_SYMBOL = "\u25C6"
 
 
 class RightColorWrongPlace:
-    def __init__(self) -> None:
-        self.termUnicode = Fore.WHITE + HINT_SYMBOL
+    __slots__ = ()
+
+    termUnicode = "w" if HEADLESS else Fore.WHITE + HINT_SYMBOL
 
     def __str__(self) -> str:
         return self.termUnicode
 
 
 class RightColorRightPlace:
-    def __init__(self) -> None:
-        self.termUnicode = Fore.BLACK + HINT_SYMBOL
+    __slots__ = ()
+
+    termUnicode = "b" if HEADLESS else Fore.BLACK + HINT_SYMBOL
 
     def __str__(self) -> str:
         return self.termUnicode
 
 
+# Hints carry no per-instance state, so printing reuses these two
+_BLACK_HINT = RightColorRightPlace()
+_WHITE_HINT = RightColorWrongPlace()
+
+
+# ** *************************************************************************
+def _codeIndex(pegs):
+    """
+    Encode a 4-peg list as a base-6 code index (0..1295)
+
+    The score table is built for exactly 4 pegs: shorter lists encode
+    as if padded with Red pegs and longer ones index past the table,
+    so callers must enforce the 4-peg invariant (see getPegsFromGuess)
+    """
+    index = 0
+    for peg in reversed(pegs):
+        index = index * 6 + peg.code
+    return index
+
+
+def _buildScoreTable():
+    """ Precompute (blacks * 5 + whites) for every pair of 4-peg codes """
+    # One row of base-6 digits per code index
+    digits = (np.arange(1296)[:, None] // 6 ** np.arange(4)) % 6
+
+    # blacks: positional matches across every (guess, target) pair
+    blacks = (digits[:, None, :] == digits[None, :, :]).sum(axis=2)
+
+    # whites: summed per-color count overlap, minus the blacks
+    counts = (digits[:, :, None] == np.arange(6)).sum(axis=1).astype(np.int8)
+    overlap = np.minimum(counts[:, None, :], counts[None, :, :]).sum(axis=2)
+
+    return (blacks * 5 + (overlap - blacks)).astype(np.uint8)
+
+
+# 1296^2 scores in a 1.6MB table - scoring a pair is one indexed load,
+#  which is what makes exhaustive Knuth-style solvers cheap
+_SCORE_TABLE = _buildScoreTable()
+
+
 # ** *************************************************************************
 class Guess:
     """ A player's guess line on the board """
 
+    __slots__ = ("pegs", "number", "blacks", "whites", "_index", "_cachedStr")
+
     def __init__(self, pegs: list = None, number: int = 0):
         if pegs:
             self.pegs = pegs
@@ -161,61 +231,46 @@ class Guess:
             self.pegs = []
 
         self.number = number
-        self.hints = []
+        self.blacks = 0
+        self.whites = 0
+        self._index = _codeIndex(self.pegs)
+        self._cachedStr = None
 
     def setPegs(self, pegs: list) -> None:
         self.pegs = pegs
+        self._index = _codeIndex(self.pegs)
+        self._cachedStr = None
 
     def isCorrect(self) -> bool:
-        if len(self.hints) != len(self.pegs):
-            return False
-        for hint in self.hints:
-            if isinstance(hint, RightColorWrongPlace):
-                return False
-        return True
+        return self.blacks == len(self.pegs)
 
     def calcHints(self, targetPegsContainer: TargetPegs) -> None:
-        targetPegs = targetPegsContainer.pegs  # bad practice
-
-        targetTaken = [False, False, False, False]
-        guessIsUsed = [False, False, False, False]
-
-        # Find Right Color, Right Location
-        for i in range(len(self.pegs)):
-            if self.pegs[i] == targetPegs[i]:
-                self.hints.append(RightColorRightPlace())
-                targetTaken[i] = True
-                guessIsUsed[i] = True
-
-        # Fine Remaining Colors, Wrong Location
-        for i in range(len(self.pegs)):
-            currGuessPeg = self.pegs[i]
-            if not guessIsUsed[i]:
-                for j in range(len(self.pegs)):
-                    if not targetTaken[j] and currGuessPeg == targetPegs[j]:
-                        self.hints.append(RightColorWrongPlace())
-                        targetTaken[j] = True
-                        break  # Check next peg guess
+        score = int(_SCORE_TABLE[self._index, targetPegsContainer._index])
+        self.blacks, self.whites = divmod(score, 5)
+        self._cachedStr = None
 
     def __str__(self) -> str:
-        ret = f"{self.number:02} |  "
+        # Rows only change when the pegs or hints do - reuse the render
+        if self._cachedStr is not None:
+            return self._cachedStr
+        parts = [f"{self.number:02} |  "]
         if len(self.pegs) > 0:
-            for peg in self.pegs:
-                ret += f"{peg} "
+            parts.extend([f"{peg} " for peg in self.pegs])
         else:
-            ret += " " * 8
-        ret += Fore.WHITE + "  |  "
-        for hint in self.hints:
-            ret += f"{hint} "
-        ret += Fore.WHITE
-        return ret
+            parts.append(" " * 8)
+        parts.append(_WHITE + "  |  ")
+        parts.extend([f"{_BLACK_HINT} "] * self.blacks)
+        parts.extend([f"{_WHITE_HINT} "] * self.whites)
+        parts.append(_WHITE)
+        self._cachedStr = "".join(parts)
+        return self._cachedStr
 
 
 # ** *************************************************************************
 class Mastermind:
     """ A game of Mastermind """
 
-    def __init__(self):
+    def __init__(self, skipIntro: bool = False):
         self.targetPegs = TargetPegs()
         self.guesses = []
         self.totalGuesses = 12
@@ -224,16 +279,21 @@ class Mastermind:
         for i in range(self.totalGuesses):
             self.guesses.append(Guess(number=(self.totalGuesses - i)))
 
-        self.calculateSecretAnimation()
+        # The intro burns ~6s of wall time - scripted drivers skip it
+        if not skipIntro:
+            self.calculateSecretAnimation()
 
     def calculateSecretAnimation(self):
         print("Calculating my secret... it'll be tough!")
+        write = sys.stdout.write
+        flush = sys.stdout.flush
         for i in range(5):
             for j in range(3):
-                print(".", end="", flush=True)
+                write(".")
+                flush()
                 sleep(0.25)
 
-            print("\r      \r", end="")
+            write("\r      \r")
         print("Got it! Let's go.")
         sleep(2)
 
@@ -246,13 +306,11 @@ class Mastermind:
         # Add animation & awesome here
         print(self)
 
-        currGuessNum = 1
-        while not self.isDone:
+        # Guesses fill the board bottom-up, so play the list in reverse
+        for guessNum, currGuess in enumerate(reversed(self.guesses), start=1):
             guessPegs = self.getPlayerGuess()
-            currGuess = self.guesses[-1 * currGuessNum]
             currGuess.setPegs(guessPegs)
             currGuess.calcHints(self.targetPegs)
-            currGuessNum += 1
 
             # See if it's a win or out of guesses
             if currGuess.isCorrect():
@@ -260,7 +318,7 @@ class Mastermind:
                 print(self)
                 print("You Won!!!!")
                 self.isDone = True
-            elif currGuessNum > self.totalGuesses:
+            elif guessNum == self.totalGuesses:
                 self.targetPegs.setRevealPegs()
                 print(self)
                 self.isDone = True
@@ -268,6 +326,9 @@ class Mastermind:
             else:
                 print(self)
 
+            if self.isDone:
+                break
+
     def getPlayerGuess(self) -> list:
         """
         Get a player's guess from terminal
@@ -292,29 +353,27 @@ class Mastermind:
     def getPegsFromGuess(self, userInput: str) -> list:
         """
         Decode a string of Pegs (user input)
-        @param userInput: string of uppercase Peg characters
+        @param userInput: string of exactly 4 uppercase Peg characters
         @return list of Peg objects (none if error)
         """
-        ret = []
+        if len(userInput) != 4:
+            print(f"{userInput} -- need exactly 4 pegs, try again")
+            return None
         for ch in userInput:
-            newPeg = Peg.getPeg(ch)
-            if not newPeg:
+            if ch not in _VALID_PEG_CHARS:
                 print(f"{ch} -- invalid color, try again")
                 return None
-            else:
-                ret.append(newPeg)
-        return ret
+        return [_PEGS[ch] for ch in userInput]
 
     def __str__(self) -> str:
-        ret = ""
-        ret += f"{'*'*28}\n"
-        ret += f"   |  {str(self.targetPegs)}\n"
-        ret += f"{'*'*28}\n"
-
-        for guess in self.guesses:
-            ret += str(guess) + "\n"
-
-        return ret
+        lines = [
+            _ROW_SEP,
+            f"   |  {self.targetPegs}",
+            _ROW_SEP,
+        ]
+        lines.extend([str(guess) for guess in self.guesses])
+        lines.append("")
+        return "\n".join(lines)
 
 
 # ** *************************************************************************
@@ -322,7 +381,7 @@ if __name__ == "__main__":
     print("Starting game - it's time for Mastermind.")
     print(Style.RESET_ALL)
 
-    game = Mastermind()
+    game = Mastermind(skipIntro="--no-intro" in sys.argv)
 
     try:
         game.playRound()